@@ -5,7 +5,7 @@ Contains all configuration classes and constants.
 
 from dataclasses import dataclass
 from enum import Enum
-from typing import List
+from typing import Tuple
 
 
 
@@ -14,16 +14,16 @@ class ExerciseType(Enum):
     KNEE_FLEXION = 'kneeFlexion'
     PARTIAL_SQUAT = 'partialSquat'
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ExerciseConfig:
     '''Configuration for exercise parameters.'''
     name: str
-    landMarks: List[str]
+    landMarks: Tuple[str, ...]
     extendedThreshold: float
     flexedThreshold: float
     side: str = 'RIGHT' # RIGHT or LEFT
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CameraConfig:
     '''Camera configuration settings.'''
     index: int = 0
@@ -31,8 +31,14 @@ class CameraConfig:
     height: int = 480
     minDetectionConfidence: float = 0.5
     minTrackingConfidence: float = 0.5
+    minLandmarkVisibility: float = 0.5 # Frames with a tracked joint below this visibility are skipped
+    modelComplexity: int = 0 # MediaPipe pose model: 0 (lite), 1 (full) or 2 (heavy)
+    inferenceInterval: int = 2 # Run pose inference every Nth frame; 1 or less runs it on every frame
+    inferenceWidth: int = 256 # Width frames are downscaled to before pose inference; 0 keeps full resolution
+    similarityPsnr: float = 40.0 # Reuse the last pose result while a frame thumbnail's PSNR stays above this; 0 disables
+    inferenceMode: str = 'sync' # 'sync' runs pose inference in the frame loop, 'thread' on a worker thread, 'process' in a worker process
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DisplaySettings:
     '''Display configuration settings.'''
     infoBoxColor: tuple = (245, 117, 16)
@@ -42,6 +48,7 @@ class DisplaySettings:
     connectionColor: tuple = (245, 66, 230)
     fontScale: float = 0.6
     fontThickness: int = 2
+    displayInterval: int = 1 # Show every Nth processed frame; raise for high frame rate cameras
 
 class ExerciseConfigs:
     '''Predefined exercise configurations.'''
@@ -49,14 +56,14 @@ class ExerciseConfigs:
     CONFIGS = {
         ExerciseType.KNEE_FLEXION: ExerciseConfig(
             name='Knee Flexion',
-            landMarks=['HIP', 'KNEE', 'ANKLE'],
+            landMarks=('HIP', 'KNEE', 'ANKLE'),
             extendedThreshold=170.0,
             flexedThreshold=108.0,
             side='RIGHT'
         ),
         ExerciseType.PARTIAL_SQUAT: ExerciseConfig(
             name='Partial Squat',
-            landMarks=['HIP', 'KNEE', 'ANKLE'],
+            landMarks=('HIP', 'KNEE', 'ANKLE'),
             extendedThreshold=170.0,
             flexedThreshold=120.0,
             side='BOTH'
@@ -3,27 +3,31 @@ Exercise tracking logic and state management.
 Handles exercise counting, state transitions, and statistics.
 '''
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any
 from dataclasses import dataclass
 
 from config import ExerciseConfig 
-from util import AngleCalculator
+from util import AngleSmoother
 
 
 
 logger = logging.getLogger(__name__)
 
+# Hysteresis buffer (degrees) to prevent state oscillation around thresholds
+HYSTERESIS = 5.0
+
 @dataclass
 class ExerciseState:
     '''Represents the current state of exercise tracking.'''
     counter: int = 0
     stage: str = None
-    angleHistory: List[float] = None
     currentAngle: float = 0.0
+    historySize: int = 10
+    smoother: AngleSmoother = None
 
     def __post_init__(self):
-        if self.angleHistory is None:
-            self.angleHistory = []
+        if self.smoother is None:
+            self.smoother = AngleSmoother(self.historySize)
 
 
 class ExerciseTracker:
@@ -37,8 +41,23 @@ class ExerciseTracker:
             exerciseConfig: Configuration for the exercise
         '''
         self.config = exerciseConfig
-        self.state = ExerciseState()
         self.maxHistoryLength = 10
+        self.state = ExerciseState(historySize=self.maxHistoryLength)
+
+        # Hysteresis-adjusted thresholds, resolved once instead of per frame
+        self._extendedBound = exerciseConfig.extendedThreshold + HYSTERESIS
+        self._flexedBound = exerciseConfig.flexedThreshold - HYSTERESIS
+
+        # Statistics are kept in one dict and updated in place as the state changes
+        self._stats: Dict[str, Any] = {
+            'exerciseName': exerciseConfig.name,
+            'counter': 0,
+            'stage': 'READY',
+            'currentAngle': 0.0,
+            'averageAngle': 0.0,
+            'extendedThreshold': exerciseConfig.extendedThreshold,
+            'flexedThreshold': exerciseConfig.flexedThreshold
+        }
 
         logger.info(f'Initialized tracker for {self.config.name}')
     
@@ -52,47 +71,51 @@ class ExerciseTracker:
         Returns:
             True if a new repetition was completed
         '''
-
-        # Add hysteresis to prevent state oscilattion
-        HYSTERIS = 5.0
+        state = self.state
+        stats = self._stats
 
         # Smooth the angle
-        smoothedAngle = AngleCalculator.smoothAngles(self.state.angleHistory, angle, self.maxHistoryLength)
-
-        self.state.currentAngle = smoothedAngle
-        previousCounter = self.state.counter
+        smoothedAngle = state.smoother.update(angle)
+        state.currentAngle = smoothedAngle
+        stats['currentAngle'] = smoothedAngle
+        stats['averageAngle'] = state.smoother.mean()
 
         # Update stage based on angle thresholds
-        if smoothedAngle > (self.config.extendedThreshold + HYSTERIS):
-            self.state.stage = 'extended'
-        elif smoothedAngle < (self.config.flexedThreshold - HYSTERIS) and self.state.stage == 'extended':
-            self.state.stage = 'flexed'
-            self.state.counter += 1
+        if smoothedAngle > self._extendedBound:
+            if state.stage != 'extended':
+                state.stage = 'extended'
+                stats['stage'] = 'extended'
+        elif smoothedAngle < self._flexedBound and state.stage == 'extended':
+            state.stage = 'flexed'
+            state.counter += 1
+            stats['stage'] = 'flexed'
+            stats['counter'] = state.counter
+
+            logger.info('%s Rep: %d', self.config.name, state.counter)
 
-            logger.info(f'{self.config.name} Rep: {self.state.counter}')
+            # A new repetition was completed
+            return True
 
-        # Return True if a new rep was completed
-        return self.state.counter > previousCounter
+        return False
 
     def resetCounter(self) -> None:
         '''Reset exercise counter and state.'''
         self.state.counter = 0
         self.state.stage =  None
-        self.state.angleHistory = []
+        self.state.smoother.reset()
+
+        self._stats.update(counter=0, stage='READY', currentAngle=self.state.currentAngle, averageAngle=0.0)
 
         logger.info(f'{self.config.name} counter reset')
 
     def getStats(self) -> Dict[str, Any]:
-        '''Get current exercise statistics.'''
-        return {
-            'exerciseName': self.config.name,
-            'counter': self.state.counter,
-            'stage': self.state.stage or 'READY',
-            'currentAngle': self.state.currentAngle,
-            'averageAngle': sum(self.state.angleHistory) / len(self.state.angleHistory) if self.state.angleHistory else 0.0,
-            'extendedThreshold': self.config.extendedThreshold,
-            'flexedThreshold': self.config.flexedThreshold
-        }
+        '''
+        Get current exercise statistics.
+
+        The same dict is returned on every call and updated in place, so callers
+        must copy it if they need a snapshot.
+        '''
+        return self._stats
 
     def getDisplayStage(self) -> str:
         '''Get stage text for display.'''
@@ -0,0 +1,90 @@
+'''
+Threaded frame capture module.
+Reads camera frames on a background thread so capture overlaps with frame processing.
+'''
+import cv2
+import numpy
+import queue
+import logging
+import threading
+from typing import Optional, Tuple
+
+from util import QueueUtils
+
+
+
+logger = logging.getLogger(__name__)
+
+class FrameGrabber:
+    '''Reads frames from a video capture on a background thread.'''
+
+    def __init__(self, videoCapture: cv2.VideoCapture, queueSize: int = 2):
+        '''
+        Initialize frame grabber.
+
+        Args:
+            videoCapture: Opened video capture to read from
+            queueSize: Maximum number of frames buffered ahead of the consumer
+        '''
+        self.videoCapture = videoCapture
+        self._frames: queue.Queue = queue.Queue(maxsize=queueSize)
+        self._stopEvent = threading.Event()
+        self._thread = threading.Thread(target=self._captureLoop, name='FrameGrabber', daemon=True)
+
+    def start(self) -> None:
+        '''Start capturing frames on the background thread.'''
+        self._thread.start()
+
+    def _captureLoop(self) -> None:
+        '''Read frames until stopped or the capture runs dry.'''
+        while not self._stopEvent.is_set():
+            returnVar, frame = self.videoCapture.read()
+            if not returnVar:
+                # Signal end of stream to the consumer
+                self._publish(None)
+                break
+
+            self._publish(frame)
+
+    def _publish(self, frame: Optional[numpy.ndarray]) -> None:
+        '''
+        Queue a frame, dropping the oldest one when the consumer falls behind.
+
+        Args:
+            frame: Captured frame, or None to signal end of stream
+        '''
+        QueueUtils.putLatest(self._frames, frame)
+
+    def read(self, timeout: float = 5.0) -> Tuple[bool, Optional[numpy.ndarray]]:
+        '''
+        Get the next captured frame.
+
+        Args:
+            timeout: Seconds to wait for a frame
+
+        Returns:
+            Tuple of success flag and frame, mirroring cv2.VideoCapture.read
+        '''
+        try:
+            frame = self._frames.get(timeout=timeout)
+        except queue.Empty:
+            logger.warning('No frame captured within %ss', timeout)
+            return False, None
+
+        return frame is not None, frame
+
+    def stop(self, timeout: float = 1.0) -> bool:
+        '''
+        Stop the capture thread.
+
+        Args:
+            timeout: Seconds to wait for an in-flight read to return
+
+        Returns:
+            True if the thread has exited and the capture can be released
+        '''
+        self._stopEvent.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+
+        return not self._thread.is_alive()
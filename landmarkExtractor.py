@@ -0,0 +1,166 @@
+'''
+Landmark extraction module.
+Resolves the landmarks an exercise tracks and extracts and draws them from MediaPipe pose results.
+'''
+
+import cv2
+import mediapipe
+import numpy
+import logging
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from config import ExerciseConfig, CameraConfig
+from util import ValidateUtils
+
+
+
+logger = logging.getLogger(__name__)
+
+class ExerciseLandmarks(NamedTuple):
+    '''Landmark indices and per-frame buffers resolved once for an exercise.'''
+    config: ExerciseConfig
+    landmarkIndices: Tuple[Tuple[int, ...], ...] # MediaPipe indices of each joint, one per tracked side
+    requiredIndices: Tuple[int, ...] # All indices that must be visible
+    points: numpy.ndarray # (joints, 2) positions buffer reused every frame
+    drawPairs: Tuple[Tuple[int, int], ...] # Connections between required landmarks, as positions in requiredIndices
+
+class LandmarkExtractor:
+    '''Extracts and draws the landmarks tracked by an exercise.'''
+    def __init__(self, cameraConfig: CameraConfig, exerciseConfig: Optional[ExerciseConfig] = None):
+        '''
+        Initialize landmark extractor.
+
+        Args:
+            cameraConfig: Camera configuration
+            exerciseConfig: Exercise configuration used to pre-resolve landmark indices
+        '''
+        self.cameraConfig = cameraConfig
+        self.mpPose = mediapipe.solutions.pose
+
+        # Plain name to index map, resolved once instead of walking the PoseLandmark enum
+        self._landmarkIndexByName: Dict[str, int] = {name: member.value for name, member in self.mpPose.PoseLandmark.__members__.items()}
+
+        self.exerciseConfig: Optional[ExerciseConfig] = None
+        self._landmarkIndices: Tuple[Tuple[int, ...], ...] = ()
+        self._requiredIndices: Tuple[int, ...] = ()
+        self._drawPairs: Tuple[Tuple[int, int], ...] = ()
+
+        # Per-exercise indices, points buffer and skeleton connections, keyed by id() of the configuration
+        self._idxCache: Dict[int, ExerciseLandmarks] = {}
+        if exerciseConfig is not None:
+            self.configureFor(exerciseConfig)
+
+    def configureFor(self, exerciseConfig: ExerciseConfig) -> None:
+        '''
+        Resolve the MediaPipe landmark indices needed by an exercise once, outside the frame loop.
+
+        Args:
+            exerciseConfig: Exercise configuration
+        '''
+        # The entry holds a reference to its configuration, so the id cannot be reused while cached
+        entry = self._idxCache.get(id(exerciseConfig))
+        if entry is None:
+            # Bilateral tracking averages the left and right landmark of each joint
+            sides = ('LEFT', 'RIGHT') if exerciseConfig.side == 'BOTH' else (exerciseConfig.side,)
+
+            landmarkIndices = tuple(
+                tuple(self._landmarkIndexByName[f'{side}_{landMarkName}'] for side in sides)
+                for landMarkName in exerciseConfig.landMarks
+            )
+
+            requiredIndices = tuple(index for indices in landmarkIndices for index in indices)
+
+            # Landmark positions are written in place into one (joints, 2) array per frame
+            points = numpy.empty((len(landmarkIndices), 2), dtype=numpy.float32)
+
+            # Only the skeleton connections between tracked landmarks are drawn, as positions in requiredIndices
+            position = {index: i for i, index in enumerate(requiredIndices)}
+            drawPairs = tuple(sorted(
+                (position[start], position[end])
+                for start, end in self.mpPose.POSE_CONNECTIONS
+                if start in position and end in position
+            ))
+
+            entry = ExerciseLandmarks(
+                config=exerciseConfig,
+                landmarkIndices=landmarkIndices,
+                requiredIndices=requiredIndices,
+                points=points,
+                drawPairs=drawPairs
+            )
+            self._idxCache[id(exerciseConfig)] = entry
+
+        self.exerciseConfig = entry.config
+        self._landmarkIndices = entry.landmarkIndices
+        self._requiredIndices = entry.requiredIndices
+        self._pts = entry.points
+        self._drawPairs = entry.drawPairs
+
+    def extractLandmarks(self, landMarks, exerciseConfig: ExerciseConfig) -> Optional[numpy.ndarray]:
+        '''
+        Extract landmark positions based on exercise configuration.
+
+        Args:
+            landMarks: MediaPipe pose landmarks
+            exerciseConfig: Exercise configuration
+
+        Returns:
+            Array of shape (joints, 2) with [x, y] rows, or None if a tracked joint is missing
+            or obscured. The array is reused on the next call.
+        '''
+        if exerciseConfig is not self.exerciseConfig:
+            self.configureFor(exerciseConfig)
+
+        # A missing or obscured joint skips the frame rather than feeding a guessed angle to the tracker
+        if not ValidateUtils.validateLandmarks(landMarks, self._requiredIndices, self.cameraConfig.minLandmarkVisibility):
+            return None
+
+        # Validation checked every required index is present, so the reads below cannot go out of range
+        points = self._pts
+        for row, indices in enumerate(self._landmarkIndices):
+            if len(indices) == 1:
+                # Single side tracking
+                landMark = landMarks[indices[0]]
+                points[row, 0] = landMark.x
+                points[row, 1] = landMark.y
+            else:
+                # Bilateral tracking uses the average of both sides
+                leftLandmark = landMarks[indices[0]]
+                rightLandmark = landMarks[indices[1]]
+                points[row, 0] = (leftLandmark.x + rightLandmark.x) / 2
+                points[row, 1] = (leftLandmark.y + rightLandmark.y) / 2
+
+        return points
+
+    def drawLandmarks(self, frame: numpy.ndarray, poseResults, landMarkColor: tuple, connectionColor: tuple) -> None:
+        '''
+        Draw the landmarks tracked by the current exercise and the connections between them on frame.
+
+        Args:
+            frame: Frame to draw on
+            poseResults: MediaPipe pose results
+            landMarkColor: Color for landmarks
+            connectionColor: Color for connections
+        '''
+        if not poseResults.pose_landmarks or not self._requiredIndices:
+            return
+
+        landMarks = poseResults.pose_landmarks.landmark
+        if len(landMarks) <= max(self._requiredIndices):
+            return
+
+        # Convert the tracked landmarks to pixels in one pass
+        coords = numpy.array([(landMarks[index].x, landMarks[index].y, landMarks[index].visibility) for index in self._requiredIndices], dtype=numpy.float32)
+        height, width = frame.shape[:2]
+        pixels = (coords[:, :2] * (width, height)).astype(numpy.int32).tolist()
+
+        # Like MediaPipe's drawing utils, skip landmarks that are off frame or barely visible
+        visible = ((coords[:, 2] >= self.cameraConfig.minLandmarkVisibility) & (coords[:, :2] >= 0.0).all(axis=1) & (coords[:, :2] <= 1.0).all(axis=1)).tolist()
+
+        for start, end in self._drawPairs:
+            if visible[start] and visible[end]:
+                cv2.line(frame, pixels[start], pixels[end], connectionColor, 2)
+
+        for pixel, isVisible in zip(pixels, visible):
+            if isVisible:
+                cv2.circle(frame, pixel, 2, landMarkColor, cv2.FILLED)
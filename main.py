@@ -3,14 +3,17 @@ Main application module.
 Coordinates all components and handles the main application loop.
 '''
 import cv2
+import numpy
 import logging
 from typing import Optional, Any
 
 from config import ExerciseType, ExerciseConfigs, CameraConfig, DisplaySettings
-from util import AngleCalculator
+from util import AngleCalculator, ErrorLogLimiter
 from poseDetector import PoseDetector
+from poseDetectorProcess import PoseDetectorProcess
 from exerciseTracker import ExerciseTracker
 from uiRenderer import UIRenderer
+from frameGrabber import FrameGrabber
 
 
 
@@ -37,14 +40,28 @@ class ExerciseApp:
         self.displaySettings = DisplaySettings()
 
         # Initialize components
-        self.poseDetector = PoseDetector(self.cameraConfig)
+        detectorClass = PoseDetectorProcess if self.cameraConfig.inferenceMode == 'process' else PoseDetector
+        self.poseDetector = detectorClass(self.cameraConfig, self.exerciseConfig)
         self.exerciseTracker = ExerciseTracker(self.exerciseConfig)
         self.uiRenderer = UIRenderer(self.displaySettings, self.cameraConfig.width, self.cameraConfig.height)
 
         # Video capture
         self.videoCapture: Optional[cv2.VideoCapture] = None
+        self.frameGrabber: Optional[FrameGrabber] = None
         self.running = True
 
+        # Pose results and landmark history for frames that skip inference
+        self._frameCount = 0
+        self._framesSinceInference = 0
+        # An interval of 1 or less infers on every frame rather than dividing by zero
+        self._inferenceInterval = max(1, self.cameraConfig.inferenceInterval)
+        self._inferenceSpacing = self._inferenceInterval
+        self._asyncInference = self.cameraConfig.inferenceMode != 'sync'
+        self._lastPoseResults = None
+        self._lastLandmarks = None
+        self._prevLandmarks = None
+        self._errorLog = ErrorLogLimiter(logger)
+
         logger.info(f'Initialized {self.exerciseConfig.name} application')
 
     def setupCamera(self) -> bool:
@@ -64,6 +81,10 @@ class ExerciseApp:
             self.videoCapture.set(cv2.CAP_PROP_FRAME_WIDTH, self.cameraConfig.width)
             self.videoCapture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.cameraConfig.height)
 
+            # Capture on a background thread so the next frame is read while this one is processed
+            self.frameGrabber = FrameGrabber(self.videoCapture)
+            self.frameGrabber.start()
+
             logger.info('Camera setup successful')
             return True
         except Exception as err:
@@ -81,20 +102,35 @@ class ExerciseApp:
             Processed frame or None if processing failed
         '''
         try:
-            # Detect pose
-            poseResults = self.poseDetector.detectPose(frame)
-            if not poseResults or not poseResults.pose_landmarks:
-                return frame
-            
-            # Extract landmarks
-            landMarkPositions = self.poseDetector.extractLandmarks(poseResults.pose_landmarks.landmark, self.exerciseConfig)
-
-            if landMarkPositions:
-                pointA, pointB, pointC = landMarkPositions
-                angle = AngleCalculator.calculateAngle(pointA=pointA, pointB=pointB, pointC=pointC) # Calculate angle
+            self._frameCount += 1
+
+            poseResults = self._nextPoseResults(frame)
+            if poseResults is not None:
+                self._lastPoseResults = poseResults
+                self._inferenceSpacing = self._framesSinceInference + 1
+                self._framesSinceInference = 0
+                if not poseResults.pose_landmarks:
+                    self._lastLandmarks = self._prevLandmarks = None
+                    return frame
+
+                # Extract landmarks
+                landMarkPositions = self.poseDetector.extractLandmarks(poseResults.pose_landmarks.landmark, self.exerciseConfig)
+                self._prevLandmarks = self._lastLandmarks
+                self._lastLandmarks = landMarkPositions.copy() if landMarkPositions is not None else None
+            else:
+                # Reuse the last inference and extrapolate joint positions between inferences
+                poseResults = self._lastPoseResults
+                if not poseResults or not poseResults.pose_landmarks:
+                    return frame
+
+                self._framesSinceInference += 1
+                landMarkPositions = self.extrapolateLandmarks()
+
+            if landMarkPositions is not None:
+                angle = AngleCalculator.calculateAngle(landMarkPositions) # Calculate angle
 
                 self.exerciseTracker.updateState(angle=angle) # Update exercise state
-                self.uiRenderer.drawAngleAtJoint(frame, angle, pointB) # Draw angle at joint
+                self.uiRenderer.drawAngleAtJoint(frame, angle, landMarkPositions[1]) # Draw angle at joint
 
             # Draw pose landmarks
             self.poseDetector.drawLandmarks(frame, poseResults, self.displaySettings.landmarkColor, self.displaySettings.connectionColor)
@@ -106,10 +142,47 @@ class ExerciseApp:
             self.uiRenderer.drawThresholds(frame, stats)
 
             return frame
-        except Exception as err:
-            logger.error(f'Frame processing error: {err}')
+        except (cv2.error, AttributeError, IndexError) as err:
+            self._errorLog.error(self._frameCount, 'Frame processing error: %s', err)
             return frame
         
+    def _nextPoseResults(self, frame) -> Optional[Any]:
+        '''
+        Get pose results for a frame that are newer than the last ones used.
+
+        Args:
+            frame: Input frame
+
+        Returns:
+            New MediaPipe pose results, or None if this frame reuses the last results
+        '''
+        runInference = self._frameCount % self._inferenceInterval == 0 or self._lastPoseResults is None
+
+        if self._asyncInference:
+            # Results arrive whenever the worker finishes, usually a frame or two after submission
+            if runInference:
+                self.poseDetector.submitFrame(frame)
+            return self.poseDetector.latestResults()
+
+        return self.poseDetector.detectPose(frame) if runInference else None
+
+    def extrapolateLandmarks(self) -> Optional[numpy.ndarray]:
+        '''
+        Linearly extrapolate landmark positions for a frame that skipped pose inference.
+
+        Returns:
+            Estimated landmark positions, held once they are one detection interval ahead,
+            the last detected positions if there is no earlier detection to extrapolate from, or None
+        '''
+        last, prev = self._lastLandmarks, self._prevLandmarks
+        if last is None or prev is None:
+            return last
+
+        # Scale the motion between the last two detections by how many frames apart they were,
+        # holding at one detection's worth of motion if the next result is late
+        step = min(self._framesSinceInference / self._inferenceSpacing, 1.0)
+        return last + (last - prev) * step
+
     def handleKeyPress(self, key: int) -> bool:
         '''
         Handle keyboard input.
@@ -141,21 +214,38 @@ class ExerciseApp:
         logger.info(f'Starting {self.exerciseConfig.name} tracking')
         logger.info('Controls: \'q\' to quit, \'r\' to reset, \'s\' to show stats')
 
+        # Bind per-frame callables and the window title once, outside the loop
+        isOpened = self.videoCapture.isOpened
+        readFrame = self.frameGrabber.read
+        processFrame = self.processFrame
+        handleKeyPress = self.handleKeyPress
+        imshow = cv2.imshow
+        windowTitle = f'{self.exerciseConfig.name} Tracker'
+        displayInterval = self.displaySettings.displayInterval
+        displayCount = 0
+
+        # pollKey (OpenCV 4.5+) pumps window events without waitKey's forced 1ms sleep
+        pollKey = cv2.pollKey if hasattr(cv2, 'pollKey') else lambda: cv2.waitKey(1)
+
         try:
-            while self.running and self.videoCapture.isOpened():
-                returnVar, frame = self.videoCapture.read()
+            while self.running and isOpened():
+                returnVar, frame = readFrame()
                 if not returnVar:
                     logger.error('Failed to read frame')
                     break
 
                 # Process frame
-                processedFrame = self.processFrame(frame)
-                if processedFrame is not None:
-                    cv2.imshow(f'{self.exerciseConfig.name} Tracker', processedFrame) # Display frame
+                processedFrame = processFrame(frame)
+
+                # Display frame at the configured cadence
+                displayCount += 1
+                if processedFrame is not None and displayCount >= displayInterval:
+                    imshow(windowTitle, processedFrame)
+                    displayCount = 0
 
                 # Handle key presses
-                key = cv2.waitKey(1) & 0xFF
-                if not self.handleKeyPress(key):
+                key = pollKey() & 0xFF
+                if not handleKeyPress(key):
                     break
         except KeyboardInterrupt:
             logger.info('Interrupted by user')
@@ -166,8 +256,14 @@ class ExerciseApp:
         # Clean up resources.
         self.running = False
 
+        # Releasing the capture while the grabber thread is still inside read() is unsupported by OpenCV
+        captureIdle = self.frameGrabber.stop() if self.frameGrabber else True
+
         if self.videoCapture:
-            self.videoCapture.release()
+            if captureIdle:
+                self.videoCapture.release()
+            else:
+                logger.warning('Camera read did not return, leaving the capture to close at exit')
 
         cv2.destroyAllWindows()
         self.poseDetector.cleanup()
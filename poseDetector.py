@@ -6,29 +6,134 @@ Handles pose estimation and landmark extraction.
 import cv2
 import mediapipe
 import numpy
+import queue
 import logging
-from typing import List, Optional, Tuple, Any
+import threading
+from typing import Any, Optional, Tuple
 
 from config import ExerciseConfig, CameraConfig
+from landmarkExtractor import LandmarkExtractor
+from util import ErrorLogLimiter, QueueUtils
 
 
 
 logger = logging.getLogger(__name__)
 
+# Thumbnail size used to detect frames that are unchanged since the last inference
+THUMBNAIL_SIZE = (96, 54)
+
+# Values of CameraConfig.inferenceMode handled here; 'process' is handled by PoseDetectorProcess
+INFERENCE_MODES = ('sync', 'thread')
+
 class PoseDetector:
     '''Handles poses detection and landmark extraction.'''
-    def __init__(self, cameraConfig: CameraConfig):
+    def __init__(self, cameraConfig: CameraConfig, exerciseConfig: Optional[ExerciseConfig] = None):
         '''
         Initialize pose detector.
 
         Args:
             cameraConfig: Camera configuration
+            exerciseConfig: Exercise configuration used to pre-resolve landmark indices
         '''
+        if cameraConfig.inferenceMode not in INFERENCE_MODES:
+            raise ValueError(f'Unsupported inference mode {cameraConfig.inferenceMode!r} for PoseDetector, expected one of {INFERENCE_MODES}; '
+                             f"use PoseDetectorProcess for 'process'")
+
         self.cameraConfig = cameraConfig
-        self.mpDrawing = mediapipe.solutions.drawing_utils
         self.mpPose = mediapipe.solutions.pose
+        self.pose = self.mpPose.Pose(
+            model_complexity=cameraConfig.modelComplexity,
+            smooth_landmarks=True,
+            enable_segmentation=False,
+            min_detection_confidence=cameraConfig.minDetectionConfidence,
+            min_tracking_confidence=cameraConfig.minTrackingConfidence
+        )
+
+        # Sized for the requested resolution and re-sized if the camera delivers another one
+        self._allocateBuffers(cameraConfig.width, cameraConfig.height)
+
+        # Owned by the inference side, which reallocates it from the frames it receives rather than on the caller's thread
+        self._rgbBuffers = self._allocateRgbBuffers(self._smallBuf.shape)
+
+        # Thumbnails of the current frame and of the frame behind the cached results
+        self._thumb = numpy.empty((THUMBNAIL_SIZE[1], THUMBNAIL_SIZE[0], 3), dtype=numpy.uint8)
+        self._lastThumb = numpy.empty_like(self._thumb)
+        self._lastResults = None
+
+        self._detectCount = 0
+        self._errorLog = ErrorLogLimiter(logger)
+
+        self.landmarkExtractor = LandmarkExtractor(cameraConfig, exerciseConfig)
+
+        # Threaded inference hands frames to a worker through single-slot queues so the frame loop never waits on MediaPipe
+        self._frameQueue: queue.Queue = queue.Queue(maxsize=1)
+        self._resultQueue: queue.Queue = queue.Queue(maxsize=1)
+        self._worker: Optional[threading.Thread] = None
+        self._workerError: Optional[BaseException] = None
+        if cameraConfig.inferenceMode == 'thread':
+            self._worker = threading.Thread(target=self._inferenceLoop, name='PoseDetector', daemon=True)
+            self._worker.start()
+
+    def configureFor(self, exerciseConfig: ExerciseConfig) -> None:
+        '''
+        Resolve the MediaPipe landmark indices needed by an exercise once, outside the frame loop.
 
-        self.pose = self.mpPose.Pose(min_detection_confidence=cameraConfig.minDetectionConfidence, min_tracking_confidence=cameraConfig.minTrackingConfidence)
+        Args:
+            exerciseConfig: Exercise configuration
+        '''
+        self.landmarkExtractor.configureFor(exerciseConfig)
+
+    def _allocateBuffers(self, frameWidth: int, frameHeight: int) -> None:
+        '''
+        Allocate the preprocessing buffers for a frame size.
+
+        Args:
+            frameWidth: Width of incoming frames
+            frameHeight: Height of incoming frames
+        '''
+        self._frameShape = (frameHeight, frameWidth)
+        self._inputSize = self.inputSizeFor(self.cameraConfig, frameWidth, frameHeight)
+        inputWidth, inputHeight = self._inputSize or (frameWidth, frameHeight)
+
+        # Reused destination for the resize
+        self._smallBuf = numpy.empty((inputHeight, inputWidth, 3), dtype=numpy.uint8)
+
+    @staticmethod
+    def inputSizeFor(cameraConfig: CameraConfig, frameWidth: int, frameHeight: int) -> Optional[Tuple[int, int]]:
+        '''
+        Get the size frames are downscaled to before inference.
+
+        Args:
+            cameraConfig: Camera configuration
+            frameWidth: Width of incoming frames
+            frameHeight: Height of incoming frames
+
+        Returns:
+            (width, height) to resize to, or None if frames are used at their own size
+        '''
+        # Frames are downscaled (keeping aspect ratio) before inference; landmarks are normalized so no rescaling is needed
+        inferenceWidth = cameraConfig.inferenceWidth
+        if 0 < inferenceWidth < frameWidth:
+            return inferenceWidth, round(frameHeight * inferenceWidth / frameWidth)
+        return None
+
+    @staticmethod
+    def _allocateRgbBuffers(shape: Tuple[int, ...]) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        '''
+        Allocate the BGR to RGB conversion destination for an inference input shape.
+
+        Args:
+            shape: Shape of the downscaled BGR frames
+
+        Returns:
+            Tuple of the writable buffer and a read-only view of it
+        '''
+        rgbBuf = numpy.empty(shape, dtype=numpy.uint8)
+
+        # MediaPipe gets a read-only view so it can skip copying the image; the flag is set here once, not per frame
+        rgbView = rgbBuf.view()
+        rgbView.flags.writeable = False
+        return rgbBuf, rgbView
 
     def detectPose(self, frame: numpy.ndarray) -> Optional[Any]:
         '''
@@ -38,166 +143,163 @@ class PoseDetector:
             frame: Input frame
 
         Returns:
-            MediaPipe pose results or None
+            MediaPipe pose results
+        '''
+        # Errors propagate to the caller instead of silently dropping the frame
+        return self._inferPrepared(self._prepareFrame(frame))
+
+    def submitFrame(self, frame: numpy.ndarray) -> None:
+        '''
+        Queue a frame for the inference worker, replacing any frame it has not picked up yet.
+
+        Args:
+            frame: Input frame
+        '''
+        # The worker gets its own downscaled copy since the caller goes on to draw on the frame
+        QueueUtils.putLatest(self._frameQueue, self._prepareFrame(frame, copy=True))
+
+    def latestResults(self) -> Optional[Any]:
+        '''
+        Get the newest results completed by the inference worker.
+
+        Returns:
+            MediaPipe pose results, or None if no inference finished since the last call.
+            Raises RuntimeError, chained to the cause, once the inference worker has stopped.
         '''
+        # Stop the caller rather than let it extrapolate from stale results; a fresh RuntimeError keeps the stored
+        # error's traceback from growing and is not among the per-frame errors processFrame logs and skips
+        if self._workerError is not None:
+            raise RuntimeError('Pose inference worker stopped') from self._workerError
+
         try:
-            # Convert color space
-            rgbFrame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            rgbFrame.flags.writeable = False
-
-            # Process pose
-            results = self.pose.process(rgbFrame)
-            return results
-        except Exception as err:
-            logger.error(f'Pose detection error: {err}')
+            return self._resultQueue.get_nowait()
+        except queue.Empty:
             return None
 
-    def extractLandmarks(self, landMarks, exerciseConfig: ExerciseConfig) -> Optional[Tuple[List[float], List[float], List[float]]]:
+    def _inferenceLoop(self) -> None:
+        '''Run pose inference on queued frames until a None frame is queued.'''
+        while True:
+            frame = self._frameQueue.get()
+            if frame is None:
+                return
+
+            try:
+                results = self.detectPrepared(frame)
+            except Exception as err:
+                # Kept for latestResults to raise on the caller's thread
+                self._workerError = err
+                return
+
+            if results is not None:
+                QueueUtils.putLatest(self._resultQueue, results)
+
+    def _prepareFrame(self, frame: numpy.ndarray, copy: bool = False) -> numpy.ndarray:
         '''
-        Extract landmark positions based on exercise configuration.
+        Downscale a frame to the inference input size.
 
         Args:
-            landMarks: MediaPipe pose landmarks
-        
+            frame: Input frame
+            copy: Return a new array instead of the reused resize buffer or the frame itself
+
         Returns:
-            Tuple of three landmark positions or None if extraction fails
+            BGR frame at the inference input size
         '''
-        try:
-            positions = []
-            for landMarkName in exerciseConfig.landMarks:
-                # Handle bilateral tracking
-                if exerciseConfig.side == 'BOTH':
-                    # Use average of both sides
-                    leftLandmark = getattr(self.mpPose.PoseLandmark, f'LEFT_{landMarkName}')
-                    rightLandmark = getattr(self.mpPose.PoseLandmark, f'RIGHT_{landMarkName}')
-
-                    x = (landMarks[leftLandmark.value].x + landMarks[rightLandmark.value].x) / 2
-                    y = (landMarks[leftLandmark.value].y + landMarks[rightLandmark.value].y) / 2
-                    positions.append([x, y])
-                else:
-                    # Single side tracking
-                    fullLandmarkName = f'{exerciseConfig.side}_{landMarkName}'
-                    landMark = landMarks[getattr(self.mpPose.PoseLandmark, fullLandmarkName).value]
-                    positions.append([landMark.x, landMark.y])
-
-            return tuple(positions)
-        except (AttributeError, IndexError) as err:
-            logger.warning(f'Failed to extract landmarks: {err}. Using fallback method')
-            
-            # Fallback to simple averaging if specific landmarks missing
-            return self.getFallbackLandmarks(landMarks, exerciseConfig)
-    
-    def getFallbackLandmarks(self, landmarks, config: ExerciseConfig):
-        '''
-        Fallback landmark detection using body proportions when standard landmarks are obscured.
+        if frame.shape[:2] != self._frameShape:
+            logger.info('Frame size changed to %dx%d, reallocating pose detection buffers', frame.shape[1], frame.shape[0])
+            self._allocateBuffers(frame.shape[1], frame.shape[0])
+
+        if self._inputSize is None:
+            return frame.copy() if copy else frame
+
+        return cv2.resize(frame, self._inputSize, dst=None if copy else self._smallBuf, interpolation=cv2.INTER_AREA)
+
+    def _inferPrepared(self, frame: numpy.ndarray) -> Any:
+        '''
+        Run pose inference on a frame already at the inference input size.
 
         Args:
-            landmarks: MediaPipe pose landmarks
-            config: Exercise configuration
+            frame: Downscaled BGR frame
 
         Returns:
-            Tuple of estimated landmark positions or None if fallback fails
+            MediaPipe pose results
         '''
+        # Skip inference while the scene is unchanged since the frame behind the cached results
+        similarityPsnr = self.cameraConfig.similarityPsnr
+        if similarityPsnr > 0:
+            thumb = cv2.resize(frame, THUMBNAIL_SIZE, dst=self._thumb, interpolation=cv2.INTER_NEAREST)
+            if self._lastResults is not None and cv2.PSNR(thumb, self._lastThumb) > similarityPsnr:
+                return self._lastResults
+
+        # Buffer and view are swapped as one pair, so MediaPipe always sees the buffer just written
+        rgbBuf, rgbView = self._rgbBuffers
+        if rgbBuf.shape != frame.shape:
+            self._rgbBuffers = rgbBuf, rgbView = self._allocateRgbBuffers(frame.shape)
+
+        # Convert color space into the preallocated buffer, which stays writable behind the read-only view
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgbBuf)
+
+        # Process pose
+        results = self.pose.process(rgbView)
+
+        if similarityPsnr > 0:
+            self._lastResults = results
+            self._thumb, self._lastThumb = self._lastThumb, self._thumb
+        return results
+
+    def detectPrepared(self, frame: numpy.ndarray) -> Optional[Any]:
+        '''
+        Detect pose in a frame already at the inference input size, logging OpenCV errors instead of raising them.
+        Used by background workers, which have no caller to raise those errors to.
+
+        Args:
+            frame: Downscaled BGR frame
+
+        Returns:
+            MediaPipe pose results or None if inference failed
+        '''
+        self._detectCount += 1
         try:
-            # Get visible landmarks for body proportions calculations
-            nose = landmarks[self.mpPose.PoseLandmark.NOSE.value]
-
-            leftHip = landmarks[self.mpPose.PoseLandmark.LEFT_HIP.value]
-            rightHip = landmarks[self.mpPose.PoseLandmark.RIGHT_HIP.value]
-
-            leftAnkle = landmarks[self.mpPose.PoseLandmark.LEFT_ANKLE.value]
-            rightAnkle = landmarks[self.mpPose.PoseLandmark.RIGHT_ANKLE.value]
-
-            # Calculate body proportions
-            hipCenterX = (leftHip.x + rightHip.x) / 2
-            hipCenterY = (leftHip.y + rightHip.y) / 2
-
-            # Estimate knee positions based on body proportions
-            if 'KNEE' in config.landMarks:
-                if config.side == 'LEFT':
-                    hip = leftHip
-                    ankle = leftAnkle
-                elif config.side == 'RIGHT':
-                    hip = rightHip
-                    ankle = rightAnkle
-                else:
-                    hip = [hipCenterX, hipCenterY]
-                    ankle = [(leftAnkle.x + rightAnkle.x) / 2, (leftAnkle.y + rightAnkle.y) / 2]
-
-                kneeX = (hip.x + ankle.x) / 2
-                kneeY = (hip.y + ankle.y) / 2
-
-                # Adjust for squat - knees move forward
-                if config.name == 'Partial Squat':
-                    forwardOffset = 0.15 * abs(hip.y - ankle.y)
-                    kneeX += forwardOffset
-
-            # Estimaate hip position
-            if 'HIP' in config.landMarks:
-                hipX = hipCenterX
-                hipY = hipCenterY
-
-                # Adjust based on exercise type
-                if config.name == 'Partial Squat':
-                    hipY += 0.05 * abs(nose.y - hipCenterY)
-
-            # Estimate ankle positions
-            if 'ANKLE' in config.landMarks:
-                if config.side == 'LEFT':
-                    ankleX = leftAnkle.x
-                    ankleY = leftAnkle.y
-                elif config.landMarks == 'RIGHT':
-                    ankleX = rightAnkle.x
-                    ankleY = rightAnkle.y
-                else:
-                    ankleX = (leftAnkle.x + rightAnkle.x) / 2
-                    ankleY = (leftAnkle.y + rightAnkle.y) / 2
-
-            # Build positions list based on required landmarks
-            positions = []
-            for landmark in config.landMarks:
-                if landmark == 'HIP':
-                    positions.append([hipX, hipY])
-                elif landmark == 'KNEE':
-                    positions.append([kneeX, kneeY])
-                elif landmark == 'ANKLE':
-                    positions.append([ankleX, ankleY])
-            
-            logger.info(f'Using fallback landmarks for {config.name}')
-            return tuple(positions)
-        except (AttributeError, IndexError) as err:
-            logger.info(f'Fallback landmark estimation failed: {err}')
+            return self._inferPrepared(frame)
+        except cv2.error as err:
+            self._errorLog.error(self._detectCount, 'Pose detection error: %s', err)
             return None
 
+    def extractLandmarks(self, landMarks, exerciseConfig: ExerciseConfig) -> Optional[numpy.ndarray]:
+        '''
+        Extract landmark positions based on exercise configuration.
+
+        Args:
+            landMarks: MediaPipe pose landmarks
+            exerciseConfig: Exercise configuration
+        
+        Returns:
+            Array of shape (joints, 2) with [x, y] rows, or None if a tracked joint is missing
+            or obscured. The array is reused on the next call.
+        '''
+        return self.landmarkExtractor.extractLandmarks(landMarks, exerciseConfig)
 
     def drawLandmarks(self, frame: numpy.ndarray, poseResults, landMarkColor: tuple, connectionColor: tuple) -> None:
         '''
-        Draw pose landmarks on frame.
-        
+        Draw the landmarks tracked by the current exercise and the connections between them on frame.
+
         Args:
             frame: Frame to draw on
             poseResults: MediaPipe pose results
             landMarkColor: Color for landmarks
             connectionColor: Color for connections
         '''
-        if poseResults.pose_landmarks:
-            self.mpDrawing.draw_landmarks(
-                frame,
-                poseResults.pose_landmarks,
-                self.mpPose.POSE_CONNECTIONS,
-                self.mpDrawing.DrawingSpec(
-                    color=landMarkColor,
-                    thickness=2,
-                    circle_radius=2
-                ),
-                self.mpDrawing.DrawingSpec(
-                    color=connectionColor,
-                    thickness=2,
-                    circle_radius=2
-                )
-            )
+        self.landmarkExtractor.drawLandmarks(frame, poseResults, landMarkColor, connectionColor)
 
     def cleanup(self) -> None:
         '''Clean up pose detector resources'''
-        if hasattr(self, 'pose'):
+        if getattr(self, '_worker', None) is not None:
+            QueueUtils.putLatest(self._frameQueue, None)
+            self._worker.join(timeout=1.0)
+            if self._worker.is_alive():
+                # Closing the graph under a running process() call is unsafe; the daemon worker ends with the process
+                logger.warning('Pose inference worker did not stop, leaving the pose model open')
+                return
+            self._worker = None
+
+        if getattr(self, 'pose', None) is not None:
             self.pose.close()
@@ -0,0 +1,281 @@
+'''
+Process based pose detection module.
+Runs MediaPipe pose inference in a separate process so it does not contend with the frame loop for the GIL.
+'''
+
+import cv2
+import numpy
+import queue
+import logging
+import dataclasses
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Any, List, NamedTuple, Optional, Tuple
+
+from mediapipe.framework.formats import landmark_pb2
+
+from config import ExerciseConfig, CameraConfig
+from landmarkExtractor import LandmarkExtractor
+from poseDetector import PoseDetector
+from util import QueueUtils
+
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for the inference process to exit before terminating it
+STOP_TIMEOUT = 2.0
+
+# Seconds detectPose waits for the inference process to return a result
+RESULT_TIMEOUT = 5.0
+
+class PoseResults(NamedTuple):
+    '''Pose results rebuilt from the inference process, mirroring the MediaPipe results attribute.'''
+    pose_landmarks: Optional[Any]
+
+def _inferenceProcess(cameraConfig: CameraConfig, shmName: str, frameShape: Tuple[int, int, int],
+                      frameLock, frameReady, stopEvent, results) -> None:
+    '''
+    Run pose inference on frames published in shared memory until stopped.
+
+    Args:
+        cameraConfig: Camera configuration
+        shmName: Name of the shared memory segment holding the latest frame
+        frameShape: Shape of the frame in shared memory
+        frameLock: Lock guarding the shared frame
+        frameReady: Event set when a new frame is published
+        stopEvent: Event set to stop the process
+        results: Queue receiving the landmarks of each inference
+    '''
+    # Frames arrive already downscaled, so the local detector runs inference on them as they are
+    height, width = frameShape[:2]
+    detector = PoseDetector(dataclasses.replace(cameraConfig, width=width, height=height, inferenceWidth=0, inferenceMode='sync'))
+
+    shm = shared_memory.SharedMemory(name=shmName)
+    sharedFrame = numpy.ndarray(frameShape, dtype=numpy.uint8, buffer=shm.buf)
+    frame = numpy.empty(frameShape, dtype=numpy.uint8)
+
+    try:
+        while True:
+            frameReady.wait()
+            if stopEvent.is_set():
+                break
+
+            # Copy the frame out so the main process can publish the next one during inference
+            with frameLock:
+                frameReady.clear()
+                numpy.copyto(frame, sharedFrame)
+
+            poseResults = detector.detectPrepared(frame)
+            if poseResults is None:
+                continue
+
+            # Only plain tuples cross the process boundary, not the full protobuf results
+            landMarks = [(landMark.x, landMark.y, landMark.visibility) for landMark in poseResults.pose_landmarks.landmark] if poseResults.pose_landmarks else []
+            QueueUtils.putLatest(results, {'landmarks': landMarks})
+    finally:
+        del sharedFrame
+        shm.close()
+        detector.cleanup()
+
+class PoseDetectorProcess:
+    '''Pose detector that runs inference in a separate process, wrapping a PoseDetector there.'''
+    def __init__(self, cameraConfig: CameraConfig, exerciseConfig: Optional[ExerciseConfig] = None):
+        '''
+        Initialize pose detector. The inference process starts with the first submitted frame.
+
+        Args:
+            cameraConfig: Camera configuration
+            exerciseConfig: Exercise configuration used to pre-resolve landmark indices
+        '''
+        if cameraConfig.inferenceMode != 'process':
+            raise ValueError(f"PoseDetectorProcess needs inference mode 'process', got {cameraConfig.inferenceMode!r}")
+
+        self.cameraConfig = cameraConfig
+        self.landmarkExtractor = LandmarkExtractor(cameraConfig, exerciseConfig)
+
+        # Spawn instead of fork, the parent already runs the capture thread
+        self._context = multiprocessing.get_context('spawn')
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._sharedFrame: Optional[numpy.ndarray] = None
+
+        # Size of the frames the running process was started for and the size they are downscaled to
+        self._frameShape: Optional[Tuple[int, int]] = None
+        self._inputSize: Optional[Tuple[int, int]] = None
+
+    def configureFor(self, exerciseConfig: ExerciseConfig) -> None:
+        '''
+        Resolve the MediaPipe landmark indices needed by an exercise once, outside the frame loop.
+
+        Args:
+            exerciseConfig: Exercise configuration
+        '''
+        self.landmarkExtractor.configureFor(exerciseConfig)
+
+    def _startProcess(self, frame: numpy.ndarray) -> None:
+        '''
+        (Re)start the inference process for the size of a frame.
+
+        Args:
+            frame: Input frame
+        '''
+        self._stopProcess()
+        if self._frameShape is not None and frame.shape[:2] != self._frameShape:
+            logger.info('Frame size changed to %dx%d, restarting pose inference process', frame.shape[1], frame.shape[0])
+        self._frameShape = frame.shape[:2]
+        self._inputSize = PoseDetector.inputSizeFor(self.cameraConfig, frame.shape[1], frame.shape[0])
+
+        inputWidth, inputHeight = self._inputSize or (frame.shape[1], frame.shape[0])
+        frameShape = (inputHeight, inputWidth, 3)
+
+        # Single frame slot; the inference process always picks up the latest frame
+        self._shm = shared_memory.SharedMemory(create=True, size=inputHeight * inputWidth * 3)
+        self._sharedFrame = numpy.ndarray(frameShape, dtype=numpy.uint8, buffer=self._shm.buf)
+        self._frameLock = self._context.Lock()
+        self._frameReady = self._context.Event()
+        self._stopEvent = self._context.Event()
+        self._results = self._context.Queue(maxsize=1)
+
+        self._process = self._context.Process(
+            target=_inferenceProcess,
+            args=(self.cameraConfig, self._shm.name, frameShape, self._frameLock, self._frameReady, self._stopEvent, self._results),
+            name='PoseDetectorProcess',
+            daemon=True
+        )
+        self._process.start()
+
+    def _stopProcess(self) -> None:
+        '''Stop the inference process and release the shared frame.'''
+        if self._process is not None:
+            # Waking a dead process blocks on its wait acknowledgement, so only signal a live one
+            if self._process.is_alive():
+                self._stopEvent.set()
+                self._frameReady.set()
+                self._process.join(timeout=STOP_TIMEOUT)
+            if self._process.is_alive():
+                logger.warning('Pose inference process did not stop, terminating it')
+                self._process.terminate()
+            self._results.close()
+            self._process = None
+
+        if self._shm is not None:
+            self._sharedFrame = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def _checkProcess(self) -> None:
+        '''Raise if the inference process exited, e.g. failing to load the model, instead of running on without poses.'''
+        if not self._process.is_alive():
+            raise RuntimeError(f'Pose inference process exited with code {self._process.exitcode}')
+
+    def submitFrame(self, frame: numpy.ndarray) -> None:
+        '''
+        Publish a frame to the inference process, replacing any frame it has not picked up yet.
+
+        Args:
+            frame: Input frame
+        '''
+        if self._process is None or frame.shape[:2] != self._frameShape:
+            self._startProcess(frame)
+        else:
+            self._checkProcess()
+
+        # Downscale straight into shared memory under the lock the process holds while copying a frame out
+        with self._frameLock:
+            if self._inputSize is None:
+                numpy.copyto(self._sharedFrame, frame)
+            else:
+                cv2.resize(frame, self._inputSize, dst=self._sharedFrame, interpolation=cv2.INTER_AREA)
+            self._frameReady.set()
+
+    def latestResults(self) -> Optional[PoseResults]:
+        '''
+        Get the newest results completed by the inference process.
+
+        Returns:
+            Pose results, or None if no inference finished since the last call.
+            Raises RuntimeError if the inference process has exited.
+        '''
+        if self._process is None:
+            return None
+
+        try:
+            payload = self._results.get_nowait()
+        except queue.Empty:
+            self._checkProcess()
+            return None
+
+        return self._buildResults(payload['landmarks'])
+
+    def detectPose(self, frame: numpy.ndarray) -> Optional[PoseResults]:
+        '''
+        Detect pose in frame, waiting for the inference process.
+
+        Args:
+            frame: Input frame
+
+        Returns:
+            Pose results or None
+        '''
+        # Drop a result left over from an earlier frame
+        self.latestResults()
+        self.submitFrame(frame)
+        try:
+            payload = self._results.get(timeout=RESULT_TIMEOUT)
+        except queue.Empty:
+            self._checkProcess()
+            logger.warning('No pose result within %ss', RESULT_TIMEOUT)
+            return None
+
+        return self._buildResults(payload['landmarks'])
+
+    @staticmethod
+    def _buildResults(landMarks: List[Tuple[float, float, float]]) -> PoseResults:
+        '''
+        Rebuild MediaPipe compatible results from landmark tuples.
+
+        Args:
+            landMarks: (x, y, visibility) of each landmark, empty when no pose was detected
+
+        Returns:
+            Pose results
+        '''
+        if not landMarks:
+            return PoseResults(pose_landmarks=None)
+
+        landmarkList = landmark_pb2.NormalizedLandmarkList()
+        for x, y, visibility in landMarks:
+            landmarkList.landmark.add(x=x, y=y, visibility=visibility)
+        return PoseResults(pose_landmarks=landmarkList)
+
+    def extractLandmarks(self, landMarks, exerciseConfig: ExerciseConfig) -> Optional[numpy.ndarray]:
+        '''
+        Extract landmark positions based on exercise configuration.
+
+        Args:
+            landMarks: Pose landmarks
+            exerciseConfig: Exercise configuration
+
+        Returns:
+            Array of shape (joints, 2) with [x, y] rows, or None if a tracked joint is missing
+            or obscured. The array is reused on the next call.
+        '''
+        return self.landmarkExtractor.extractLandmarks(landMarks, exerciseConfig)
+
+    def drawLandmarks(self, frame: numpy.ndarray, poseResults, landMarkColor: tuple, connectionColor: tuple) -> None:
+        '''
+        Draw the landmarks tracked by the current exercise and the connections between them on frame.
+
+        Args:
+            frame: Frame to draw on
+            poseResults: Pose results
+            landMarkColor: Color for landmarks
+            connectionColor: Color for connections
+        '''
+        self.landmarkExtractor.drawLandmarks(frame, poseResults, landMarkColor, connectionColor)
+
+    def cleanup(self) -> None:
+        '''Clean up pose detector resources'''
+        self._stopProcess()
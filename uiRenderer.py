@@ -4,7 +4,7 @@ Handles drawing UI elements on video frames.
 '''
 import cv2
 import numpy
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 from config import DisplaySettings
 
@@ -26,6 +26,82 @@ class UIRenderer:
         self.frameWidth = frameWidth
         self.frameHeight = frameHeight
 
+        # Font and colors used on every frame, resolved once
+        self._font = cv2.FONT_HERSHEY_SIMPLEX
+        self._textColor = tuple(displaySettings.textColor)
+        self._textColorDark = tuple(displaySettings.textColorDark)
+        self._infoBoxColor = tuple(displaySettings.infoBoxColor)
+        self._landmarkColor = tuple(displaySettings.landmarkColor)
+
+        # Static text is rasterized once into small layers and blitted each frame
+        instructions = ['Press \'q\' to quit', 'Press \'r\' to reset counter']
+        yStart = self.frameHeight - 60
+        self._instructionsLayer = self._buildTextLayer(
+            [(instruction, (10, yStart + i * 20), 0.5, 1) for i, instruction in enumerate(instructions)],
+            self.settings.textColor
+        )
+
+        # Threshold layer is built on first use and rebuilt only if the thresholds change
+        self._thresholdsKey = None
+        self._thresholdsLayer = None
+
+        # Info box is rendered into a cached patch only when the values it shows change.
+        # The patch covers the filled rectangle from (0, 0) to (280, 120) inclusive.
+        self._infoKey = None
+        self._infoBox = numpy.empty((121, 281, 3), dtype=numpy.uint8)
+
+    def _buildTextLayer(self, lines: List[Tuple[str, Tuple[int, int], float, int]], color: tuple) -> Tuple[int, int, numpy.ndarray, numpy.ndarray]:
+        '''
+        Rasterize text lines once into a patch and mask sized to fit them.
+
+        Args:
+            lines: Tuples of (text, origin, font scale, thickness) in frame coordinates
+            color: Text color
+
+        Returns:
+            Tuple of (x, y, patch, mask) where (x, y) is the patch's top-left frame position
+        '''
+        boxes = []
+        for text, (x, y), scale, thickness in lines:
+            (width, height), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+            boxes.append((x - thickness, y - height - thickness, x + width + thickness, y + baseline + thickness))
+
+        x0 = min(box[0] for box in boxes)
+        y0 = min(box[1] for box in boxes)
+        x1 = max(box[2] for box in boxes)
+        y1 = max(box[3] for box in boxes)
+
+        patch = numpy.zeros((y1 - y0, x1 - x0, 3), dtype=numpy.uint8)
+        mask = numpy.zeros((y1 - y0, x1 - x0), dtype=numpy.uint8)
+        for text, (x, y), scale, thickness in lines:
+            origin = (x - x0, y - y0)
+            # Aliased strokes keep the mask binary, matching putText's default output
+            cv2.putText(patch, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, color, thickness, cv2.LINE_8)
+            cv2.putText(mask, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, 255, thickness, cv2.LINE_8)
+
+        return x0, y0, patch, mask[..., None].astype(bool)
+
+    @staticmethod
+    def _blitLayer(frame: numpy.ndarray, layer: Tuple[int, int, numpy.ndarray, numpy.ndarray]) -> None:
+        '''
+        Copy the text pixels of a prerendered layer onto the frame, clipped to the frame bounds.
+
+        Args:
+            frame: Frame to draw on
+            layer: Layer built by _buildTextLayer
+        '''
+        x0, y0, patch, mask = layer
+        height, width = patch.shape[:2]
+
+        left, top = max(x0, 0), max(y0, 0)
+        right, bottom = min(x0 + width, frame.shape[1]), min(y0 + height, frame.shape[0])
+        if right <= left or bottom <= top:
+            return
+
+        patchRows = slice(top - y0, bottom - y0)
+        patchCols = slice(left - x0, right - x0)
+        numpy.copyto(frame[top:bottom, left:right], patch[patchRows, patchCols], where=mask[patchRows, patchCols])
+
     def drawInfoBox(self, frame: numpy.ndarray, stats: Dict[str, Any]) -> None:
         '''
         Draw information box with exercise stats.
@@ -34,15 +110,40 @@ class UIRenderer:
             frame: Frame to draw on
             stats: Exercise statistics
         '''
-        cv2.rectangle(frame, (0, 0), (280, 120), self.settings.infoBoxColor, -1280)
+        infoKey = (stats['exerciseName'], stats['counter'], stats['stage'], int(stats['currentAngle']))
+        if infoKey != self._infoKey:
+            self._renderInfoBox(*infoKey)
+            self._infoKey = infoKey
+
+        box = self._infoBox
+        height = min(box.shape[0], frame.shape[0])
+        width = min(box.shape[1], frame.shape[1])
+        frame[:height, :width] = box[:height, :width]
+
+    def _renderInfoBox(self, exerciseName: str, counter: int, stage: str, angle: int) -> None:
+        '''
+        Render the information box into the cached patch.
 
-        cv2.putText(frame, stats['exerciseName'].upper(), (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, self.settings.textColorDark, 2)
-        cv2.putText(frame, 'REPS', (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.settings.textColorDark, 1)
-        cv2.putText(frame, str(stats['counter']), (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.4, self.settings.textColorDark, 2)
-        cv2.putText(frame, 'STAGE', (120, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.settings.textColorDark, 1)
-        cv2.putText(frame, stats['stage'], (120, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.9, self.settings.textColor, 2)
+        Args:
+            exerciseName: Exercise name
+            counter: Repetition count
+            stage: Exercise stage text
+            angle: Current angle in whole degrees
+        '''
+        box = self._infoBox
+        putText = cv2.putText
+        font = self._font
+        textColorDark = self._textColorDark
+
+        cv2.rectangle(box, (0, 0), (280, 120), self._infoBoxColor, cv2.FILLED)
+
+        putText(box, exerciseName.upper(), (10, 25), font, 0.7, textColorDark, 2)
+        putText(box, 'REPS', (10, 50), font, 0.5, textColorDark, 1)
+        putText(box, str(counter), (10, 80), font, 1.4, textColorDark, 2)
+        putText(box, 'STAGE', (120, 50), font, 0.5, textColorDark, 1)
+        putText(box, stage, (120, 80), font, 0.9, self._textColor, 2)
 
-        cv2.putText(frame, f'ANGLE: {int(stats['currentAngle'])}deg', (10, 105), cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.settings.textColorDark, 1)
+        putText(box, f'ANGLE: {angle}deg', (10, 105), font, 0.5, textColorDark, 1)
 
     def drawAngleAtJoint(self, frame: numpy.ndarray, angle: float, jointPosition: List[float]) -> None:
         '''
@@ -54,10 +155,10 @@ class UIRenderer:
             jointPosition: Joint position [x, y] in normalized coordinates
         '''
         # Convert normalized coordinates to pixel coordinates
-        pixelPos = tuple(numpy.multiply(jointPosition, [self.frameWidth, self.frameHeight]).astype(int))
+        pixelPos = (int(jointPosition[0] * self.frameWidth), int(jointPosition[1] * self.frameHeight))
 
-        cv2.putText(frame, f'{int(angle)}deg', pixelPos, cv2.FONT_HERSHEY_SIMPLEX, 0.6, self.settings.textColor, 2) # Draw angle text
-        cv2.circle(frame, pixelPos, 5, self.settings.landmarkColor, -1) # Draw small circle at joint
+        cv2.putText(frame, f'{int(angle)}deg', pixelPos, self._font, 0.6, self._textColor, 2) # Draw angle text
+        cv2.circle(frame, pixelPos, 5, self._landmarkColor, cv2.FILLED) # Draw small circle at joint
 
     def drawInstructions(self, frame: numpy.ndarray) -> None:
         '''
@@ -66,11 +167,7 @@ class UIRenderer:
         Args:
             frame: Frame to draw on
         '''
-        instructions = ['Press \'q\' to quit', 'Press \'r\' to reset counter']
-
-        yStart = self.frameHeight - 60
-        for i, instruction in enumerate(instructions):
-            cv2.putText(frame, instruction, (10, yStart + i * 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.settings.textColor, 1)
+        self._blitLayer(frame, self._instructionsLayer)
 
     def drawThresholds(self, frame: numpy.ndarray, stats: Dict[str, Any]) -> None:
         '''
@@ -80,6 +177,16 @@ class UIRenderer:
             frame: Frame to draw on
             stats: Exercise statistics
         '''
-        xStart = self.frameHeight - 200
-        cv2.putText(frame, f'Extended: {int(stats['extendedThreshold'])}deg', (xStart, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.4, self.settings.textColor, 1)
-        cv2.putText(frame, f'Flexed: {int(stats['flexedThreshold'])}deg', (xStart, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.4, self.settings.textColor, 1)
\ No newline at end of file
+        thresholdsKey = (int(stats['extendedThreshold']), int(stats['flexedThreshold']))
+        if thresholdsKey != self._thresholdsKey:
+            xStart = self.frameHeight - 200
+            self._thresholdsLayer = self._buildTextLayer(
+                [
+                    (f'Extended: {thresholdsKey[0]}deg', (xStart, 25), 0.4, 1),
+                    (f'Flexed: {thresholdsKey[1]}deg', (xStart, 45), 0.4, 1)
+                ],
+                self.settings.textColor
+            )
+            self._thresholdsKey = thresholdsKey
+
+        self._blitLayer(frame, self._thresholdsLayer)
\ No newline at end of file
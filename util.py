@@ -3,91 +3,174 @@ Utility functions for exercise tracking system.
 Contains angle calculations and other helper functions.
 '''
 
+import math
 import numpy
+import queue
 import logging
-from typing import List
+from collections import deque
+from typing import Any, Deque, Sequence
 
 
 
 logger = logging.getLogger(__name__)
 
+# Minimum number of calls between repeated error logs from a per-frame path
+ERROR_LOG_INTERVAL = 30
+
 class AngleCalculator:
     '''Utility class for angle calculations.'''
 
     @staticmethod
-    def calculateAngle(pointA: List[float], pointB: List[float], pointC: List[float]) -> float:
+    def calculateAngle(points: numpy.ndarray) -> float:
         '''
-        Calculate angle between three points.
+        Calculate the angle at the middle of three points.
 
         Args:
-            pointA: First point coordinated [x, y]
-            pointB: Vertex point coordinated [x, y]
-            pointC: Third point coordinated [x, y]
+            points: Array of shape (3, 2) holding the start, vertex and end coordinates [x, y]
 
         Returns:
-            Angle in degrees
+            Angle in degrees between 0 and 180
         '''
-        try:
-            startPoint = numpy.array(pointA)
-            midPoint = numpy.array(pointB)
-            endPoint = numpy.array(pointC)
+        if len(points) != 3:
+            raise ValueError(f'Expected 3 points, got {len(points)}')
 
-            radians = numpy.arctan2(endPoint[1] - midPoint[1], endPoint[0] - midPoint[0]) - numpy.arctan2(startPoint[1] - midPoint[1], startPoint[0] - midPoint[0])
-            angle = numpy.abs(radians * 180.0 / numpy.pi)
+        # Plain floats keep this scalar math free of numpy per-call overhead
+        (startX, startY), (midX, midY), (endX, endY) = points.tolist()
+        startDX, startDY = startX - midX, startY - midY
+        endDX, endDY = endX - midX, endY - midY
 
-            if angle > 180.0:
-                angle = 360.0 - angle
+        # atan2 of the cross and dot products gives the unsigned angle directly
+        cross = startDX * endDY - startDY * endDX
+        dot = startDX * endDX + startDY * endDY
 
-            return angle
-        except Exception as err:
-            logger.error(f'Error calculating angle: {err}')
-            return 0.0
+        return math.degrees(math.atan2(abs(cross), dot))
 
-    @staticmethod
-    def smoothAngles(angleHistory: List[float], newAngle: float, maxHistory: int = 10) -> float:
+
+class AngleSmoother:
+    '''Rolling mean over a fixed window of angle measurements with O(1) updates.'''
+
+    def __init__(self, maxHistory: int = 10):
+        '''
+        Initialize angle smoother.
+
+        Args:
+            maxHistory: Number of angles in the smoothing window
+        '''
+        self.maxHistory = maxHistory
+        self.buf: Deque[float] = deque(maxlen=maxHistory)
+        self.sum = 0.0
+        self._updates = 0
+
+    def update(self, newAngle: float) -> float:
         '''
-        Apply smoothing to angle measurements.
-        
+        Add an angle measurement.
+
         Args:
-            angleHistory; History of angle measurements
             newAngle: New angle measurement
-            maxHistory: Maximum number of angles to keep in history
 
         Returns:
             Smoothed angle
         '''
-        angleHistory.append(newAngle)
-        if len(angleHistory) > maxHistory:
-            angleHistory.pop(0)
+        buf = self.buf
+        if len(buf) == self.maxHistory:
+            self.sum -= buf[0]
+        buf.append(newAngle)
+        self.sum += newAngle
+
+        # Re-derive the running sum once per window so rounding error cannot accumulate
+        self._updates += 1
+        if self._updates == self.maxHistory:
+            self._updates = 0
+            self.sum = math.fsum(buf)
+
+        return self.sum / len(buf)
 
-        return float(numpy.mean(angleHistory))
+    def mean(self) -> float:
+        '''Get the mean of the angles in the window.'''
+        return self.sum / len(self.buf) if self.buf else 0.0
+
+    def reset(self) -> None:
+        '''Drop all angles from the window.'''
+        self.buf.clear()
+        self.sum = 0.0
+        self._updates = 0
 
 
 class ValidateUtils:
     '''Utility class for validation functions.'''
 
     @staticmethod
-    def validateLandmarks(landMarks, requiredLandmarks: List[str]) -> bool:
+    def validateLandmarks(landMarks, requiredIndices: Sequence[int], minVisibility: float = 0.5) -> bool:
         '''
-        Validate that required landmarks are present
+        Validate that required landmarks are present and visible.
 
         Args:
-            landMarks: MediaPipe pose landmarks
-            requiredLandmarks: List of required landmark name
+            landMarks: MediaPipe pose landmark list
+            requiredIndices: Indices of the required landmarks
+            minVisibility: Minimum visibility score for a landmark to count as visible
 
         Returns:
-            True if all landmarks are present and valid
+            True if all landmarks are present and visible
         '''
         if not landMarks:
             return False
-        
-        try:
-            for landMarkName in requiredLandmarks:
-                # Check if landmark exists and has valid coordinates
-                if not hasattr(landMarkName, landMarkName.lower()):
-                    return False
-                
-            return True
-        except Exception as err:
-            logger.error(f'Landmark validation error: {err}')
-            return False
\ No newline at end of file
+
+        landMarkCount = len(landMarks)
+        for index in requiredIndices:
+            if index >= landMarkCount or landMarks[index].visibility < minVisibility:
+                return False
+
+        return True
+
+
+class QueueUtils:
+    '''Utility class for queue helpers.'''
+
+    @staticmethod
+    def putLatest(targetQueue: queue.Queue, item: Any) -> None:
+        '''
+        Queue an item without blocking, dropping the oldest entries when the queue is full.
+
+        Args:
+            targetQueue: Bounded queue shared with a consumer
+            item: Item to queue
+        '''
+        while True:
+            try:
+                targetQueue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    targetQueue.get_nowait()
+                except queue.Empty:
+                    pass
+
+
+class ErrorLogLimiter:
+    '''Rate limits an error that can repeat on every frame.'''
+
+    def __init__(self, errorLogger: logging.Logger, interval: int = ERROR_LOG_INTERVAL):
+        '''
+        Initialize error log limiter.
+
+        Args:
+            errorLogger: Logger to write errors to
+            interval: Minimum count difference between two logged errors
+        '''
+        self.errorLogger = errorLogger
+        self.interval = interval
+        self._lastLogCount = -interval
+
+    def error(self, count: int, message: str, *args: Any) -> None:
+        '''
+        Log an error unless one was logged within the last interval.
+
+        Args:
+            count: Caller's running frame or call count
+            message: Log message format string
+            args: Log message arguments
+        '''
+        # A persistent failure would otherwise log on every frame
+        if count - self._lastLogCount >= self.interval:
+            self.errorLogger.error(message, *args)
+            self._lastLogCount = count